@@ -6,10 +6,97 @@ Created on Fri Jul  5 14:59:09 2024
 @author: nullcipherr
 """
 
-import matplotlib.pyplot as plt
+import sys
+from functools import lru_cache, reduce
+
 import numpy as np
 import skfuzzy as fuzz
-from skfuzzy import control as ctrl
+
+
+def _somente_leitura(array):
+  """Marca um array como somente leitura e o retorna."""
+  array.setflags(write=False)
+  return array
+
+
+# Universos de discurso, compartilhados por todas as instâncias
+_UNIV_FC = _somente_leitura(np.arange(60, 121, 1))
+_UNIV_010 = _somente_leitura(np.arange(0, 11, 1))
+_UNIV_ANS = _somente_leitura(np.arange(0, 101, 1))
+
+# Limites inferior e superior das entradas (frequência cardíaca, preocupação, sono, tensão)
+_LIMITES_ENTRADA = _somente_leitura(np.array([[60, 0, 0, 0], [120, 10, 10, 10]]))
+
+# Faixas do nível de ansiedade: limites entre as faixas e o diagnóstico de cada uma
+_LIMITES_FAIXAS = _somente_leitura(np.array([30.0, 60.0]))
+_ROTULOS_FAIXAS = _somente_leitura(np.array([
+  "Baixo nível de ansiedade",
+  "Nível moderado de ansiedade",
+  "Alto nível de ansiedade",
+], dtype=object))
+
+# Diagnóstico de um nível indefinido (NaN), quando nenhuma regra é ativada
+_ROTULO_SEM_REGRA = "Nenhuma regra ativada"
+
+# Base de regras: (operador, termos de frequência cardíaca, preocupação, sono e
+# tensão muscular, termo do nível de ansiedade). O operador ('e' ou 'ou') combina
+# os antecedentes; uma tupla de termos em um mesmo antecedente é a disjunção deles.
+_REGRAS = [
+  # Regra 1: Frequência cardíaca normal, baixo nível de preocupação, boa qualidade do sono, tensão muscular relaxada
+  # Resulta em baixo nível de ansiedade
+  ('e', ('normal', 'baixo', 'boa', 'relaxada'), 'baixo'),
+
+  # Regra 2: Frequência cardíaca elevada, moderada preocupação, sono regular, tensão muscular moderada
+  # Resulta em nível moderado de ansiedade
+  ('e', ('elevada', 'moderado', 'regular', 'moderada'), 'moderado'),
+
+  # Regra 3: Frequência cardíaca muito elevada, alto nível de preocupação, sono ruim, tensão muscular tensa
+  # Resulta em alto nível de ansiedade
+  ('e', ('muito_elevada', 'alto', 'ruim', 'tensa'), 'alto'),
+
+  # Regra 4: Qualquer um dos antecedentes com valores elevados resulta em nível moderado de ansiedade
+  ('ou', ('elevada', 'alto', 'ruim', 'tensa'), 'moderado'),
+
+  # Regra 5: Frequência cardíaca normal, baixo nível de preocupação, sono bom ou regular, tensão muscular relaxada
+  # Resulta em baixo nível de ansiedade
+  ('e', ('normal', 'baixo', ('boa', 'regular'), 'relaxada'), 'baixo'),
+
+  # Regra 6: Frequência cardíaca elevada, baixo nível de preocupação, bom sono, tensão muscular relaxada
+  # Resulta em nível moderado de ansiedade
+  ('e', ('elevada', 'baixo', 'boa', 'relaxada'), 'moderado'),
+
+  # Regra 7: Frequência cardíaca muito elevada, moderada preocupação, sono ruim, tensão muscular tensa
+  # Resulta em alto nível de ansiedade
+  ('e', ('muito_elevada', 'moderado', 'ruim', 'tensa'), 'alto'),
+
+  # Regra 8: Frequência cardíaca normal, moderada preocupação, sono ruim, tensão muscular tensa
+  # Resulta em nível moderado de ansiedade
+  ('e', ('normal', 'moderado', 'ruim', 'tensa'), 'moderado'),
+
+  # Regra 9: Frequência cardíaca elevada, alta preocupação, bom sono, tensão muscular relaxada
+  # Resulta em alto nível de ansiedade
+  ('e', ('elevada', 'alto', 'boa', 'relaxada'), 'alto'),
+
+  # Regra 10: Frequência cardíaca muito elevada, baixo nível de preocupação, bom sono, tensão muscular moderada
+  # Resulta em nível moderado de ansiedade
+  ('e', ('muito_elevada', 'baixo', 'boa', 'moderada'), 'moderado'),
+
+  # Regra 11: Frequência cardíaca normal, alta preocupação, sono regular, tensão muscular tensa
+  # Resulta em alto nível de ansiedade
+  ('e', ('normal', 'alto', 'regular', 'tensa'), 'alto'),
+
+  # Regra 12: Frequência cardíaca elevada, moderada preocupação, sono ruim, tensão muscular relaxada
+  # Resulta em alto nível de ansiedade
+  ('e', ('elevada', 'moderado', 'ruim', 'relaxada'), 'alto'),
+
+  # Regra 13: Frequência cardíaca normal, moderada preocupação, bom sono, tensão muscular moderada
+  # Resulta em nível moderado de ansiedade
+  ('e', ('normal', 'moderado', 'boa', 'moderada'), 'moderado'),
+
+  # Regra 14: Frequência cardíaca muito elevada, alta preocupação, sono ruim, tensão muscular relaxada
+  # Resulta em alto nível de ansiedade
+  ('e', ('muito_elevada', 'alto', 'ruim', 'relaxada'), 'alto'),
+]
 
 class DiagnosticoAnsiedadeFuzzy:
   """
@@ -17,141 +104,640 @@ class DiagnosticoAnsiedadeFuzzy:
 
     Esta classe implementa um sistema de inferência fuzzy para avaliar o nível de ansiedade
     com base em quatro parâmetros: frequência cardíaca, nível de preocupação, qualidade do sono
-    e tensão muscular.
+    e tensão muscular. A inferência é do tipo Mamdani (mínimo/máximo), feita diretamente
+    sobre arrays do NumPy, e a defuzzificação usa `skfuzzy.defuzz`.
 
     Attributes:
-        freq_cardiaca (Antecedent): Variável fuzzy para frequência cardíaca.
-        preocupacao (Antecedent): Variável fuzzy para nível de preocupação.
-        sono (Antecedent): Variável fuzzy para qualidade do sono.
-        tensao (Antecedent): Variável fuzzy para tensão muscular.
-        ansiedade (Consequent): Variável fuzzy para nível de ansiedade (resultado).
-        sistema_ctrl (ControlSystem): Sistema de controle fuzzy.
-        simulacao (ControlSystemSimulation): Simulação do sistema de controle fuzzy.
+        metodo_defuzz (str): Último método de defuzzificação usado (também nos gráficos).
+        _universos (dict): Universo de discurso de cada variável fuzzy.
+        _mfs (dict): Funções de pertinência de cada termo de cada variável.
   """
 
+  # Antecedentes, na ordem em que as entradas são informadas, e seus universos
+  _ANTECEDENTES = (
+    ('frequencia_cardiaca', _UNIV_FC),
+    ('nivel_preocupacao', _UNIV_010),
+    ('qualidade_sono', _UNIV_010),
+    ('tensao_muscular', _UNIV_010),
+  )
+
+  # Indica se as tabelas de `setup_inferencia_vetorizada` já foram montadas
+  _inferencia_preparada = False
+
+  # Funções de pertinência de cada variável, calculadas uma única vez na definição
+  # da classe e compartilhadas (somente leitura) entre as instâncias
+  _MF = {
+    # Frequência cardíaca
+    'frequencia_cardiaca': {
+      'normal': _somente_leitura(fuzz.trapmf(_UNIV_FC, [60, 60, 70, 80])),
+      'elevada': _somente_leitura(fuzz.trimf(_UNIV_FC, [70, 85, 100])),
+      'muito_elevada': _somente_leitura(fuzz.trapmf(_UNIV_FC, [90, 100, 120, 120])),
+    },
+    # Nível de preocupação
+    'nivel_preocupacao': {
+      'baixo': _somente_leitura(fuzz.trimf(_UNIV_010, [0, 0, 5])),
+      'moderado': _somente_leitura(fuzz.trimf(_UNIV_010, [3, 5, 7])),
+      'alto': _somente_leitura(fuzz.trimf(_UNIV_010, [5, 10, 10])),
+    },
+    # Qualidade do sono
+    'qualidade_sono': {
+      'boa': _somente_leitura(fuzz.trimf(_UNIV_010, [7, 10, 10])),
+      'regular': _somente_leitura(fuzz.trimf(_UNIV_010, [3, 5, 7])),
+      'ruim': _somente_leitura(fuzz.trimf(_UNIV_010, [0, 0, 3])),
+    },
+    # Tensão muscular
+    'tensao_muscular': {
+      'relaxada': _somente_leitura(fuzz.trimf(_UNIV_010, [0, 0, 4])),
+      'moderada': _somente_leitura(fuzz.trimf(_UNIV_010, [3, 5, 7])),
+      'tensa': _somente_leitura(fuzz.trimf(_UNIV_010, [6, 10, 10])),
+    },
+    # Nível de ansiedade
+    'nivel_ansiedade': {
+      'baixo': _somente_leitura(fuzz.trimf(_UNIV_ANS, [0, 0, 40])),
+      'moderado': _somente_leitura(fuzz.trimf(_UNIV_ANS, [30, 50, 70])),
+      'alto': _somente_leitura(fuzz.trimf(_UNIV_ANS, [60, 100, 100])),
+    },
+  }
+
 
   def __init__(self):
     """
     Inicializa o sistema de diagnóstico de ansiedade fuzzy.
 
-    Cria as variáveis fuzzy, define suas funções de pertinência,
-    estabelece as regras fuzzy e configura o sistema de controle.
+    Monta as tabelas da inferência vetorizada, se esta é a primeira instância,
+    associa os universos de discurso e as funções de pertinência (constantes da
+    classe, somente leitura) e prepara os caches da inferência de um único caso.
     """
-    # Criação das variáveis fuzzy (antecedentes e consequente)
-    self.freq_cardiaca = ctrl.Antecedent(np.arange(60, 121, 1), 'frequencia_cardiaca')
-    self.preocupacao = ctrl.Antecedent(np.arange(0, 11, 1), 'nivel_preocupacao')
-    self.sono = ctrl.Antecedent(np.arange(0, 11, 1), 'qualidade_sono')
-    self.tensao = ctrl.Antecedent(np.arange(0, 11, 1), 'tensao_muscular')
-    self.ansiedade = ctrl.Consequent(np.arange(0, 101, 1), 'nivel_ansiedade')
+    # Tabelas da inferência vetorizada, montadas na primeira instância e
+    # compartilhadas pelas seguintes
+    self.setup_inferencia_vetorizada()
 
-    # Configuração das funções de pertinência e regras fuzzy
-    self.setup_fuzzy_variables()
-    self.setup_fuzzy_rules()
+    # Universos e funções de pertinência do sistema (as regras ficam em `_REGRAS`)
+    self._universos = dict(self._ANTECEDENTES, nivel_ansiedade=_UNIV_ANS)
+    self._mfs = self._MF
 
-    # Criação do sistema de controle e simulação
-    self.sistema_ctrl = ctrl.ControlSystem(self.regras)
-    self.simulacao = ctrl.ControlSystemSimulation(self.sistema_ctrl)
+    # Método de defuzzificação do último diagnóstico (usado também nos gráficos)
+    self.metodo_defuzz = 'centroid'
 
-  def setup_fuzzy_variables(self):
+    self._iniciar_caches()
+
+  def _iniciar_caches(self):
+    """Cria os caches da inferência de um único caso e libera a figura dos gráficos."""
+    # Caches LRU da inferência de um único caso: a saída agregada (que não depende
+    # do método de defuzzificação) e o nível de ansiedade de cada método. As
+    # chaves são as entradas exatas: só leituras repetidas reaproveitam o cache,
+    # e o resultado é sempre o mesmo de `diagnostico_lote`
+    self._agregacao_caso = lru_cache(maxsize=2048)(self._agregar_caso)
+    self._nivel_caso = lru_cache(maxsize=4096)(self._calcular_nivel)
+
+    # Figura dos gráficos, criada sob demanda e reaproveitada enquanto estiver aberta
+    self._figura = None
+
+  def __getstate__(self):
     """
-      Define as funções de pertinência para cada variável fuzzy.
+      Retorna o estado da instância para o pickle, sem os caches, a figura e as
+      referências às constantes da classe (universos e funções de pertinência).
 
-      Utiliza diferentes tipos de funções de pertinência (trapezoidal e triangular)
-      para representar os conjuntos fuzzy de cada variável.
+      Permite enviar a instância a outros processos (por exemplo, com
+      `concurrent.futures.ProcessPoolExecutor` e `diagnostico_ansiedade_lote`).
+    """
+    estado = self.__dict__.copy()
+    for atributo in ('_agregacao_caso', '_nivel_caso', '_figura', '_universos', '_mfs'):
+      del estado[atributo]
+    return estado
+
+  def __setstate__(self, estado):
+    """Restaura uma instância vinda do pickle, com caches vazios e as constantes compartilhadas da classe."""
+    self.__init__()
+    self.__dict__.update(estado)
+
+  @classmethod
+  def setup_inferencia_vetorizada(cls):
     """
-    # Definição das funções de pertinência para frequência cardíaca
-    self.freq_cardiaca['normal'] = fuzz.trapmf(self.freq_cardiaca.universe, [60, 60, 70, 80])
-    self.freq_cardiaca['elevada'] = fuzz.trimf(self.freq_cardiaca.universe, [70, 85, 100])
-    self.freq_cardiaca['muito_elevada'] = fuzz.trapmf(self.freq_cardiaca.universe, [90, 100, 120, 120])
+      Prepara as matrizes usadas pela inferência vetorizada.
+
+      Empilha as funções de pertinência de cada variável e traduz a base de
+      regras para uma tabela de termos, permitindo avaliar todas as regras
+      para um lote de entradas com operações do NumPy. As matrizes dependem
+      apenas de `_MF` e `_REGRAS`, então são montadas uma única vez, na criação
+      da primeira instância, e compartilhadas entre as instâncias; importar o
+      módulo não as monta.
+    """
+    if cls._inferencia_preparada:
+      return
+    termos_entrada = [list(cls._MF[rotulo]) for rotulo, _ in cls._ANTECEDENTES]
+    termos_saida = list(cls._MF['nivel_ansiedade'])
+    n_antecedentes = len(cls._ANTECEDENTES)
+
+    # Funções de pertinência empilhadas: uma linha por termo
+    cls._mf_entrada = [np.stack(list(cls._MF[rotulo].values())) for rotulo, _ in cls._ANTECEDENTES]
+    cls._mf_saida = np.stack(list(cls._MF['nivel_ansiedade'].values()))
+
+    # Os universos de entrada são grades inteiras de passo 1: a posição de uma
+    # entrada no universo indexa diretamente as tabelas de pertinência. Cada
+    # tabela tem uma linha por ponto do universo (pertinência de todos os termos
+    # lado a lado) e vem acompanhada da variação até o ponto seguinte, de modo
+    # que a interpolação linear é uma única consulta por tabela
+    cls._inicio_universo = np.array([universo[0] for _, universo in cls._ANTECEDENTES], dtype=np.float64)
+    cls._ultimo_indice = np.array([len(universo) - 1 for _, universo in cls._ANTECEDENTES])
+    cls._tabelas_entrada = []
+    for mf in cls._mf_entrada:
+      tabela = np.ascontiguousarray(mf.T)
+      variacao = np.zeros_like(tabela)
+      variacao[:-1] = tabela[1:] - tabela[:-1]
+      cls._tabelas_entrada.append((_somente_leitura(tabela), _somente_leitura(variacao)))
+    # Tabelas do lote, em precisão dupla e simples (`dtype` de `inferencia_lote`),
+    # com uma linha por termo: o lote é processado termo a termo (estrutura de
+    # arrays), e cada consulta preenche uma linha contígua de N casos
+    cls._tabelas_lote = {
+      np.dtype(tipo): (
+        cls._inicio_universo.astype(tipo),
+        cls._ultimo_indice.astype(tipo),
+        [
+          (_somente_leitura(np.ascontiguousarray(tabela.T, dtype=tipo)), _somente_leitura(np.ascontiguousarray(variacao.T, dtype=tipo)))
+          for tabela, variacao in cls._tabelas_entrada
+        ],
+      )
+      for tipo in (np.float64, np.float32)
+    }
+    cls._tabelas_caso = [
+      (float(inicio), int(ultimo), tabela.tolist(), variacao.tolist())
+      for inicio, ultimo, (tabela, variacao) in zip(cls._inicio_universo, cls._ultimo_indice, cls._tabelas_entrada)
+    ]
 
-    # Definição das funções de pertinência para nível de preocupação
-    self.preocupacao['baixo'] = fuzz.trimf(self.preocupacao.universe, [0, 0, 5])
-    self.preocupacao['moderado'] = fuzz.trimf(self.preocupacao.universe, [3, 5, 7])
-    self.preocupacao['alto'] = fuzz.trimf(self.preocupacao.universe, [5, 10, 10])
+    # Colunas de pertinência de cada antecedente: os termos simples seguidos das
+    # disjunções de termos usadas nas regras (ex.: sono bom ou regular)
+    colunas = [[(t,) for t in range(len(termos))] for termos in termos_entrada]
+    for _, termos, _ in _REGRAS:
+      for k, termo in enumerate(termos):
+        if isinstance(termo, tuple):
+          composto = tuple(termos_entrada[k].index(t) for t in termo)
+          if composto not in colunas[k]:
+            colunas[k].append(composto)
+    cls._n_colunas = max(len(colunas_k) for colunas_k in colunas)
+    cls._termos_compostos = [
+      [(c, composto) for c, composto in enumerate(colunas_k) if len(composto) > 1]
+      for colunas_k in colunas
+    ]
 
-    # Definição das funções de pertinência para qualidade do sono
-    self.sono['boa'] = fuzz.trimf(self.sono.universe, [7, 10, 10])
-    self.sono['regular'] = fuzz.trimf(self.sono.universe, [3, 5, 7])
-    self.sono['ruim'] = fuzz.trimf(self.sono.universe, [0, 0, 3])
+    # Tabela de regras em estrutura de arrays: coluna de pertinência de cada
+    # antecedente, operador e termo consequente de cada regra
+    n_regras = len(_REGRAS)
+    cls._regras_coluna = np.zeros((n_regras, n_antecedentes), dtype=np.int8)
+    cls._regras_ou = np.zeros(n_regras, dtype=bool)
+    cls._regras_consequente = np.zeros(n_regras, dtype=np.int8)
+    for r, (operador, termos, consequente) in enumerate(_REGRAS):
+      for k, termo in enumerate(termos):
+        composto = tuple(termos_entrada[k].index(t) for t in termo) if isinstance(termo, tuple) else (termos_entrada[k].index(termo),)
+        cls._regras_coluna[r, k] = colunas[k].index(composto)
+      cls._regras_ou[r] = operador == 'ou'
+      cls._regras_consequente[r] = termos_saida.index(consequente)
+
+    # Posição de cada grau na matriz de pertinências achatada (antecedente,
+    # coluna), com uma linha por antecedente: cada linha consulta, de uma vez, o
+    # grau desse antecedente em todas as regras
+    cls._regras_indice = np.ascontiguousarray((np.arange(n_antecedentes) * cls._n_colunas + cls._regras_coluna).T, dtype=np.intp)
+    cls._regras_ou_indice = np.flatnonzero(cls._regras_ou)
+    cls._regras_por_consequente = [np.flatnonzero(cls._regras_consequente == t) for t in range(len(termos_saida))]
+
+    # Inferência de um único caso especializada para esta tabela de regras
+    cls._regras_caso = staticmethod(cls._gerar_regras_caso())
+
+    # Pesos da área e do momento da saída agregada sobre o universo de saída: em
+    # cada trecho linear [x1, x2], área = h*(y1 + y2)/2 e momento =
+    # h*(y1*(2*x1 + x2) + y2*(x1 + 2*x2))/6, com h = x2 - x1
+    universo = _UNIV_ANS.astype(np.float64)
+    x1, x2 = universo[:-1], universo[1:]
+    h = x2 - x1
+    cls._pesos_area = np.zeros(len(universo))
+    cls._pesos_area[:-1] += h / 2
+    cls._pesos_area[1:] += h / 2
+    cls._pesos_momento = np.zeros(len(universo))
+    cls._pesos_momento[:-1] += h * (2 * x1 + x2) / 6
+    cls._pesos_momento[1:] += h * (x1 + 2 * x2) / 6
+    cls._universo_saida = universo.tolist()
+    cls._saida_lote = {
+      np.dtype(tipo): tuple(_somente_leitura(array.astype(tipo)) for array in (universo, cls._mf_saida, cls._pesos_area, cls._pesos_momento))
+      for tipo in (np.float64, np.float32)
+    }
+    cls._tabela_saida = cls._mf_saida.tolist()
+
+    cls._inferencia_preparada = True
+
+  @classmethod
+  def _gerar_regras_caso(cls):
+    """
+      Gera uma função em linha reta que avalia a tabela de regras para um caso.
 
-    # Definição das funções de pertinência para tensão muscular
-    self.tensao['relaxada'] = fuzz.trimf(self.tensao.universe, [0, 0, 4])
-    self.tensao['moderada'] = fuzz.trimf(self.tensao.universe, [3, 5, 7])
-    self.tensao['tensa'] = fuzz.trimf(self.tensao.universe, [6, 10, 10])
+      Como as regras são fixas, o código de cada regra é escrito uma única vez
+      (sem laços nem consultas à tabela) e compilado com `exec`. A função recebe
+      as pertinências de `_fuzzificar_caso` e retorna os cortes dos termos de saída.
 
-    # Definição das funções de pertinência para nível de ansiedade
-    self.ansiedade['baixo'] = fuzz.trimf(self.ansiedade.universe, [0, 0, 40])
-    self.ansiedade['moderado'] = fuzz.trimf(self.ansiedade.universe, [30, 50, 70])
-    self.ansiedade['alto'] = fuzz.trimf(self.ansiedade.universe, [60, 100, 100])
+      Returns:
+          function: Função `regras(mu)` que retorna a lista de cortes.
+    """
+    n_antecedentes = len(cls._ANTECEDENTES)
+    linhas = ["def regras(mu):", f"  {', '.join(f'mu{k}' for k in range(n_antecedentes))} = mu"]
+    for r, (ou, colunas) in enumerate(zip(cls._regras_ou, cls._regras_coluna)):
+      graus = ', '.join(f"mu{k}[{c}]" for k, c in enumerate(colunas))
+      linhas.append(f"  r{r} = {'max' if ou else 'min'}({graus})")
+    cortes = []
+    for regras in cls._regras_por_consequente:
+      disparos = ', '.join(f"r{r}" for r in regras)
+      cortes.append(f"max({disparos})" if len(regras) > 1 else disparos)
+    linhas.append(f"  return [{', '.join(cortes)}]")
+
+    namespace = {}
+    exec("\n".join(linhas), namespace)
+    return namespace['regras']
+
+  def inferencia_lote(self, entradas, dtype=np.float64):
+    """
+      Avalia a base de regras para um lote de entradas em uma única passagem.
 
+      Args:
+          entradas (array-like): Matriz (N, 4) com frequência cardíaca, nível de
+              preocupação, qualidade do sono e tensão muscular de cada caso.
+          dtype (np.dtype): Precisão do cálculo, np.float64 (padrão) ou np.float32.
+              Em precisão simples, lotes grandes usam metade da memória e o
+              centroide difere do scikit-fuzzy na ordem de 1e-5; os métodos
+              baseados no máximo (mom, som, lom) e o bisector podem mudar de
+              ponto quando os cortes empatam em precisão dupla.
+
+      Returns:
+          np.ndarray: Matriz (N, 3) com o corte (ativação acumulada) de cada termo
+          do nível de ansiedade (baixo, moderado, alto) para cada caso. Casos com
+          alguma entrada ausente (NaN) têm todos os cortes NaN.
+    """
+    inicio, ultimo, tabelas = self._tabelas_lote[np.dtype(dtype)]
+    entradas = np.atleast_2d(np.asarray(entradas, dtype=dtype))
+
+    # Fuzzificação por consulta às tabelas, com interpolação linear entre os
+    # pontos vizinhos (equivalente a np.interp no universo). As pertinências
+    # ficam em uma linha contígua por (antecedente, coluna): (antecedente * coluna, N)
+    posicao = np.clip(entradas - inicio, 0, ultimo).T
+    # Entradas ausentes consultam a primeira posição da tabela, e os seus casos
+    # são descartados ao final, sem interromper o restante do lote
+    ausente = np.isnan(posicao)
+    posicao[ausente] = 0
+    i = posicao.astype(np.intp)
+    frac = posicao - i
+    mu = np.zeros((len(tabelas), self._n_colunas, len(entradas)), dtype=dtype)
+    for k, (tabela, variacao) in enumerate(tabelas):
+      mu[k, :len(tabela)] = np.take(tabela, i[k], axis=1) + np.take(variacao, i[k], axis=1) * frac[k]
+      for coluna, composto in self._termos_compostos[k]:
+        mu[k, coluna] = reduce(np.maximum, (mu[k, t] for t in composto))
+    mu = mu.reshape(len(tabelas) * self._n_colunas, len(entradas))
+
+    # Força de disparo das regras: o mínimo dos graus ('e') é acumulado
+    # antecedente a antecedente, sem montar a matriz (regra, antecedente, N), e
+    # as regras 'ou' são refeitas com o máximo das linhas de pertinência
+    disparo = mu[self._regras_indice[0]]
+    for indice in self._regras_indice[1:]:
+      np.minimum(disparo, mu[indice], out=disparo)
+    for r in self._regras_ou_indice:
+      disparo[r] = reduce(np.maximum, (mu[c] for c in self._regras_indice[:, r]))
+
+    # Acumulação por termo de saída (máximo das regras com o mesmo consequente)
+    cortes = np.stack([reduce(np.maximum, (disparo[r] for r in regras)) for regras in self._regras_por_consequente], axis=1)
+    cortes[ausente.any(axis=0)] = np.nan
+    return cortes
+
+  def _fuzzificar_caso(self, entradas):
+    """
+      Calcula a pertinência de cada termo de cada antecedente para um único caso.
+
+      Consulta as tabelas de pertinência pela posição da entrada no universo,
+      interpolando linearmente entre os pontos vizinhos como `np.interp`.
+
+      Args:
+          entradas (tuple): Valores nítidos dos quatro antecedentes.
+
+      Returns:
+          list: Lista por antecedente com a pertinência de cada coluna (termos
+          simples seguidos das disjunções usadas nas regras).
+    """
+    mu = []
+    for valor, (inicio, ultimo, tabela, variacao), compostos in zip(entradas, self._tabelas_caso, self._termos_compostos):
+      posicao = min(max(valor - inicio, 0.0), ultimo)
+      i = int(posicao)
+      frac = posicao - i
+      mu_k = [base + delta * frac for base, delta in zip(tabela[i], variacao[i])]
+      mu_k.extend(max(mu_k[t] for t in composto) for _, composto in compostos)
+      mu.append(mu_k)
+    return mu
+
+  def inferencia_caso(self, freq_card, nivel_preoc, qual_sono, tensao_musc):
+    """
+      Avalia a base de regras para um único caso.
+
+      Versão escalar de `inferencia_lote`: avalia as regras com floats do Python
+      na função gerada por `_gerar_regras_caso`, evitando montar matrizes do
+      NumPy para um só caso.
+
+      Args:
+          freq_card (float): Frequência cardíaca.
+          nivel_preoc (float): Nível de preocupação.
+          qual_sono (float): Qualidade do sono.
+          tensao_musc (float): Tensão muscular.
 
-  def setup_fuzzy_rules(self):
+      Returns:
+          list: Corte de cada termo do nível de ansiedade (baixo, moderado, alto).
     """
-      Define as regras do sistema fuzzy.
+    mu = self._fuzzificar_caso((freq_card, nivel_preoc, qual_sono, tensao_musc))
+    return self._regras_caso(mu)
 
-      Estabelece um conjunto de regras que relacionam as variáveis de entrada
-      (antecedentes) com a variável de saída (consequente), formando a base de
-      conhecimento do sistema fuzzy.
+  @staticmethod
+  def _cortar_termos(universo, mfs, cortes):
     """
+      Corta a função de pertinência de cada termo de uma variável no seu nível.
 
-    self.regras = [
-      # Regra 1: Frequência cardíaca normal, baixo nível de preocupação, boa qualidade do sono, tensão muscular relaxada
-      # Resulta em baixo nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['normal'] & self.preocupacao['baixo'] & self.sono['boa'] & self.tensao['relaxada'], self.ansiedade['baixo']),
+      Reproduz o scikit-fuzzy, incluindo no universo os pontos em que cada termo
+      atinge o seu corte.
 
-      # Regra 2: Frequência cardíaca elevada, moderada preocupação, sono regular, tensão muscular moderada
-      # Resulta em nível moderado de ansiedade
-      ctrl.Rule(self.freq_cardiaca['elevada'] & self.preocupacao['moderado'] & self.sono['regular'] & self.tensao['moderada'], self.ansiedade['moderado']),
+      Args:
+          universo (np.ndarray): Universo de discurso da variável.
+          mfs (sequence): Função de pertinência de cada termo sobre o universo.
+          cortes (sequence): Nível de corte de cada termo.
 
-      # Regra 3: Frequência cardíaca muito elevada, alto nível de preocupação, sono ruim, tensão muscular tensa
-      # Resulta em alto nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['muito_elevada'] & self.preocupacao['alto'] & self.sono['ruim'] & self.tensao['tensa'], self.ansiedade['alto']),
+      Returns:
+          tuple: Universo amostrado e matriz (termo, ponto) com os termos cortados.
+    """
+    pontos = [universo]
+    for corte, mf in zip(cortes, mfs):
+      pontos.append(fuzz.interp_universe(universo, mf, corte))
+    universo_amostrado = np.unique(np.concatenate(pontos))
 
-      # Regra 4: Qualquer um dos antecedentes com valores elevados resulta em nível moderado de ansiedade
-      ctrl.Rule(self.freq_cardiaca['elevada'] | self.preocupacao['alto'] | self.sono['ruim'] | self.tensao['tensa'], self.ansiedade['moderado']),
+    cortados = np.stack([np.minimum(corte, np.interp(universo_amostrado, universo, mf)) for corte, mf in zip(cortes, mfs)])
+    return universo_amostrado, cortados
 
-      # Regra 5: Frequência cardíaca normal, baixo nível de preocupação, sono bom ou regular, tensão muscular relaxada
-      # Resulta em baixo nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['normal'] & self.preocupacao['baixo'] & (self.sono['boa'] | self.sono['regular']) & self.tensao['relaxada'], self.ansiedade['baixo']),
+  def agregar(self, cortes):
+    """
+      Agrega os termos de saída cortados em uma única função de pertinência.
 
-      # Regra 6: Frequência cardíaca elevada, baixo nível de preocupação, bom sono, tensão muscular relaxada
-      # Resulta em nível moderado de ansiedade
-      ctrl.Rule(self.freq_cardiaca['elevada'] & self.preocupacao['baixo'] & self.sono['boa'] & self.tensao['relaxada'], self.ansiedade['moderado']),
+      Reproduz a agregação do scikit-fuzzy (máximo dos termos cortados sobre o
+      universo amostrado por `_cortar_termos`), para que os métodos de
+      defuzzificação produzam os mesmos valores do sistema de controle.
 
-      # Regra 7: Frequência cardíaca muito elevada, moderada preocupação, sono ruim, tensão muscular tensa
-      # Resulta em alto nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['muito_elevada'] & self.preocupacao['moderado'] & self.sono['ruim'] & self.tensao['tensa'], self.ansiedade['alto']),
+      Args:
+          cortes (array-like): Corte de cada termo de saída para um único caso.
 
-      # Regra 8: Frequência cardíaca normal, moderada preocupação, sono ruim, tensão muscular tensa
-      # Resulta em nível moderado de ansiedade
-      ctrl.Rule(self.freq_cardiaca['normal'] & self.preocupacao['moderado'] & self.sono['ruim'] & self.tensao['tensa'], self.ansiedade['moderado']),
+      Returns:
+          tuple: Universo amostrado e pertinência agregada sobre ele.
+    """
+    universo_amostrado, cortados = self._cortar_termos(self._universos['nivel_ansiedade'], self._mf_saida, cortes)
+    return universo_amostrado, cortados.max(axis=0)
 
-      # Regra 9: Frequência cardíaca elevada, alta preocupação, bom sono, tensão muscular relaxada
-      # Resulta em alto nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['elevada'] & self.preocupacao['alto'] & self.sono['boa'] & self.tensao['relaxada'], self.ansiedade['alto']),
+  def defuzzificar(self, agregacao, metodo_defuzz='centroid'):
+    """
+      Calcula o valor nítido de uma saída agregada.
 
-      # Regra 10: Frequência cardíaca muito elevada, baixo nível de preocupação, bom sono, tensão muscular moderada
-      # Resulta em nível moderado de ansiedade
-      ctrl.Rule(self.freq_cardiaca['muito_elevada'] & self.preocupacao['baixo'] & self.sono['boa'] & self.tensao['moderada'], self.ansiedade['moderado']),
+      A agregação não depende do método de defuzzificação, então o resultado de
+      `agregar` pode ser reaproveitado para comparar vários métodos.
 
-      # Regra 11: Frequência cardíaca normal, alta preocupação, sono regular, tensão muscular tensa
-      # Resulta em alto nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['normal'] & self.preocupacao['alto'] & self.sono['regular'] & self.tensao['tensa'], self.ansiedade['alto']),
+      Args:
+          agregacao (tuple): Universo amostrado e pertinência agregada (ver `agregar`).
+          metodo_defuzz (str): Método de defuzzificação (padrão: 'centroid').
 
-      # Regra 12: Frequência cardíaca elevada, moderada preocupação, sono ruim, tensão muscular relaxada
-      # Resulta em alto nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['elevada'] & self.preocupacao['moderado'] & self.sono['ruim'] & self.tensao['relaxada'], self.ansiedade['alto']),
+      Returns:
+          float: Nível de ansiedade defuzzificado.
+    """
+    universo_amostrado, agregada = agregacao
+    return fuzz.defuzz(universo_amostrado, agregada, metodo_defuzz)
 
-      # Regra 13: Frequência cardíaca normal, moderada preocupação, bom sono, tensão muscular moderada
-      # Resulta em nível moderado de ansiedade
-      ctrl.Rule(self.freq_cardiaca['normal'] & self.preocupacao['moderado'] & self.sono['boa'] & self.tensao['moderada'], self.ansiedade['moderado']),
+  @staticmethod
+  def _area_momento(xa, ya, xb, yb):
+    """
+      Calcula a área e o momento de um trecho linear da saída agregada.
 
-      # Regra 14: Frequência cardíaca muito elevada, alta preocupação, sono ruim, tensão muscular relaxada
-      # Resulta em alto nível de ansiedade
-      ctrl.Rule(self.freq_cardiaca['muito_elevada'] & self.preocupacao['alto'] & self.sono['ruim'] & self.tensao['relaxada'], self.ansiedade['alto'])
-    ]
+      Args:
+          xa, ya (float ou np.ndarray): Ponto inicial do trecho.
+          xb, yb (float ou np.ndarray): Ponto final do trecho.
+
+      Returns:
+          tuple: Área sob o trecho e seu momento em relação à origem.
+    """
+    largura = xb - xa
+    return largura * (ya + yb) / 2, largura * (ya * (2 * xa + xb) + yb * (xa + 2 * xb)) / 6
+
+  def _centroide_caso(self, cortes):
+    """
+      Calcula o centroide da saída agregada de um único caso.
+
+      Equivalente a `defuzzificar(agregar(cortes), 'centroid')`, mas sem montar
+      o universo amostrado: a área e o momento da agregação sobre o universo vêm
+      de dois produtos escalares com os pesos pré-calculados, e só os trechos que
+      contêm pontos de cruzamento dos cortes são corrigidos, um a um.
+
+      Args:
+          cortes (sequence): Corte de cada termo de saída, como retornado por `inferencia_caso`.
 
-  def diagnostico_ansiedade(self, freq_card, nivel_preoc, qual_sono, tensao_musc, metodo_defuzz='centroid'):
+      Returns:
+          float: Nível de ansiedade pelo método do centroide.
+
+      Raises:
+          EmptyMembershipError: Se nenhuma regra dispara.
+    """
+    cortes = np.asarray(cortes, dtype=np.float64)[:, None]
+
+    # Saída agregada nos pontos do universo
+    agregada = np.minimum(cortes, self._mf_saida).max(axis=0)
+    if not agregada.any():
+      raise fuzz.EmptyMembershipError()
+    area = float(self._pesos_area @ agregada)
+    momento = float(self._pesos_momento @ agregada)
+
+    # Pontos em que cada termo cruza o seu corte, como `fuzz.interp_universe`,
+    # agrupados pelo trecho do universo que os contém (com corte nulo, os
+    # cruzamentos caem sobre pontos do universo e não alteram a agregação)
+    universo, mf = self._universo_saida, self._tabela_saida
+    acima = self._mf_saida >= cortes
+    cortes = cortes[:, 0].tolist()
+    pontos = {}
+    termos, trechos = np.nonzero(np.diff(acima, axis=1))
+    for t, k in zip(termos.tolist(), trechos.tolist()):
+      if cortes[t] > 0:
+        x = universo[k] + (cortes[t] - mf[t][k]) * (universo[k + 1] - universo[k]) / (mf[t][k + 1] - mf[t][k])
+        pontos.setdefault(k, set()).add(x)
+
+    # Cada trecho dividido pelos pontos de cruzamento troca a sua contribuição
+    # original pela soma das contribuições dos sub-trechos
+    for k, pontos_k in pontos.items():
+      x1, x2 = universo[k], universo[k + 1]
+      xs = [x1, *sorted(pontos_k), x2]
+      ys = [float(agregada[k])]
+      for x in xs[1:-1]:
+        ys.append(max(min(corte, mf_t[k] + (x - x1) * (mf_t[k + 1] - mf_t[k]) / (x2 - x1)) for corte, mf_t in zip(cortes, mf)))
+      ys.append(float(agregada[k + 1]))
+      a_trecho, m_trecho = self._area_momento(x1, ys[0], x2, ys[-1])
+      area -= a_trecho
+      momento -= m_trecho
+      for xa, xb, ya, yb in zip(xs, xs[1:], ys, ys[1:]):
+        a_sub, m_sub = self._area_momento(xa, ya, xb, yb)
+        area += a_sub
+        momento += m_sub
+
+    return momento / max(area, np.finfo(float).eps)
+
+  def centroide_lote(self, cortes):
+    """
+      Calcula o centroide das saídas agregadas de um lote de casos de uma só vez.
+
+      Versão vetorizada de `_centroide_caso`: a área e o momento da agregação
+      sobre o universo de saída vêm de dois produtos com os pesos pré-calculados
+      e só os trechos que contêm pontos de cruzamento dos cortes (no máximo dois
+      por termo) são corrigidos, com operações do NumPy sobre todos os casos.
+
+      Args:
+          cortes (np.ndarray): Matriz (N, 3) de cortes, como retornada por
+              `inferencia_lote`. Cortes em float32 são processados em float32.
+
+      Returns:
+          np.ndarray: Centroide de cada caso (NaN quando nenhuma regra dispara).
+    """
+    cortes = np.asarray(cortes)
+    tipo = np.result_type(cortes.dtype, np.float32)
+    universo, mf, pesos_area, pesos_momento = self._saida_lote[tipo]
+    cortes = cortes.astype(tipo, copy=False)
+    n = len(cortes)
+
+    # Saída agregada nos pontos do universo, com sua área e momento
+    agregada = np.minimum(cortes[:, :, None], mf).max(axis=1)
+    area = agregada @ pesos_area
+    momento = agregada @ pesos_momento
+
+    # Trechos do universo em que cada termo cruza o seu corte (os termos de saída
+    # são convexos: no máximo um cruzamento em cada lado do pico). Com corte nulo,
+    # os cruzamentos caem sobre pontos do universo e não alteram a agregação
+    c = cortes[:, :, None]
+    cruza = np.diff(mf >= c, axis=2)
+    valido = cruza.any(axis=2, keepdims=True) & (c > 0)
+    trechos = np.concatenate([cruza.argmax(axis=2)[:, :, None], cruza.shape[2] - 1 - cruza[:, :, ::-1].argmax(axis=2)[:, :, None]], axis=2)
+
+    # Ponto de cruzamento por interpolação linear, como `fuzz.interp_universe`
+    termo = np.arange(len(mf))[None, :, None]
+    mf_i, mf_j = mf[termo, trechos], mf[termo, trechos + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+      pontos = universo[trechos] + (c - mf_i) * (universo[trechos + 1] - universo[trechos]) / (mf_j - mf_i)
+
+    # Pontos válidos em ordem crescente (os inválidos vão para o fim)
+    pontos = np.where(valido, pontos, np.inf).reshape(n, 2 * len(mf))
+    trechos = trechos.reshape(n, 2 * len(mf))
+    ordem = np.argsort(pontos, axis=1)
+    pontos = np.take_along_axis(pontos, ordem, axis=1)
+    trechos = np.take_along_axis(trechos, ordem, axis=1)
+    valido = np.isfinite(pontos)
+    pontos = np.where(valido, pontos, universo[0])
+    y = np.minimum(cortes[:, 0, None], np.interp(pontos, universo, mf[0]).astype(tipo))
+    for t in range(1, len(mf)):
+      np.maximum(y, np.minimum(cortes[:, t, None], np.interp(pontos, universo, mf[t]).astype(tipo)), out=y)
+
+    # Vizinhos de cada ponto dentro do seu trecho: o ponto anterior, se estiver no
+    # mesmo trecho, ou o início do trecho; e o fim do trecho para o último ponto
+    linhas = np.arange(n)[:, None]
+    x1, x2 = universo[trechos], universo[trechos + 1]
+    y1, y2 = agregada[linhas, trechos], agregada[linhas, trechos + 1]
+    mesmo_anterior = np.zeros_like(valido)
+    mesmo_anterior[:, 1:] = valido[:, 1:] & (trechos[:, 1:] == trechos[:, :-1])
+    mesmo_seguinte = np.zeros_like(valido)
+    mesmo_seguinte[:, :-1] = mesmo_anterior[:, 1:]
+    xa = np.where(mesmo_anterior, np.roll(pontos, 1, axis=1), x1)
+    ya = np.where(mesmo_anterior, np.roll(y, 1, axis=1), y1)
+
+    # Cada trecho dividido troca a sua contribuição original pela soma das
+    # contribuições dos sub-trechos
+    a_entrada, m_entrada = self._area_momento(xa, ya, pontos, y)
+    a_saida, m_saida = self._area_momento(pontos, y, x2, y2)
+    a_trecho, m_trecho = self._area_momento(x1, y1, x2, y2)
+    fecha = valido & ~mesmo_seguinte
+    abre = valido & ~mesmo_anterior
+    area += np.where(valido, a_entrada, 0).sum(axis=1) + np.where(fecha, a_saida, 0).sum(axis=1) - np.where(abre, a_trecho, 0).sum(axis=1)
+    momento += np.where(valido, m_entrada, 0).sum(axis=1) + np.where(fecha, m_saida, 0).sum(axis=1) - np.where(abre, m_trecho, 0).sum(axis=1)
+
+    centroide = momento / np.fmax(area, np.finfo(float).eps)
+    centroide[~agregada.any(axis=1)] = np.nan
+    return centroide
+
+  def diagnostico_lote(self, entradas, metodos_defuzz=('centroid',), dtype=np.float64):
+    """
+      Calcula o nível de ansiedade de um lote de casos em uma única passagem.
+
+      A inferência de todos os casos é feita de uma vez por `inferencia_lote`. O
+      centroide é calculado para o lote inteiro por `centroide_lote`; os demais
+      métodos defuzzificam a saída agregada de cada caso.
+
+      Args:
+          entradas (array-like): Matriz (N, 4) com frequência cardíaca, nível de
+              preocupação, qualidade do sono e tensão muscular de cada caso.
+          metodos_defuzz (sequence): Métodos de defuzzificação (padrão: ('centroid',)).
+          dtype (np.dtype): Precisão do cálculo (ver `inferencia_lote`).
+
+      Returns:
+          np.ndarray: Matriz (N, M) com o nível de ansiedade de cada caso para cada
+          método. Casos em que nenhuma regra dispara ou com alguma entrada
+          ausente (NaN) resultam em NaN em todos os métodos.
+    """
+    cortes = self.inferencia_lote(entradas, dtype)
+    niveis = np.full((len(cortes), len(metodos_defuzz)), np.nan, dtype=dtype)
+
+    # Só os casos com alguma regra ativada são defuzzificados: com todos os
+    # cortes nulos, mom, som e lom ainda retornariam um valor arbitrário. Casos
+    # com entrada ausente (cortes NaN) também ficam indefinidos
+    definido = (cortes > 0).any(axis=1)
+    cortes_definidos = cortes[definido]
+
+    # Centroide vetorizado para todo o lote
+    por_caso = []
+    for j, metodo in enumerate(metodos_defuzz):
+      if metodo == 'centroid':
+        niveis[definido, j] = self.centroide_lote(cortes_definidos)
+      else:
+        por_caso.append((j, metodo))
+    if not por_caso:
+      return niveis
+
+    for i, cortes_caso in zip(np.flatnonzero(definido), cortes_definidos):
+      agregacao = self.agregar(cortes_caso)
+      for j, metodo in por_caso:
+        niveis[i, j] = self.defuzzificar(agregacao, metodo)
+    return niveis
+
+  def diagnostico_ansiedade_lote(self, freq_card, nivel_preoc, qual_sono, tensao_musc, metodo_defuzz='centroid', dtype=np.float64):
+    """
+      Calcula o nível de ansiedade de vários pacientes em uma única passagem.
+
+      Versão em lote de `diagnostico_ansiedade`, com um array por parâmetro.
+
+      Args:
+          freq_card (array-like): Frequência cardíaca de cada caso, shape (N,).
+          nivel_preoc (array-like): Nível de preocupação de cada caso, shape (N,).
+          qual_sono (array-like): Qualidade do sono de cada caso, shape (N,).
+          tensao_musc (array-like): Tensão muscular de cada caso, shape (N,).
+          metodo_defuzz (str): Método de defuzzificação (padrão: 'centroid').
+          dtype (np.dtype): Precisão do cálculo (ver `inferencia_lote`).
+
+      Returns:
+          np.ndarray: Nível de ansiedade de cada caso, shape (N,) (NaN quando
+          nenhuma regra dispara).
+    """
+    entradas = np.column_stack(np.broadcast_arrays(freq_card, nivel_preoc, qual_sono, tensao_musc))
+    return self.diagnostico_lote(entradas, (metodo_defuzz,), dtype)[:, 0]
+
+  def _agregar_caso(self, freq_card, nivel_preoc, qual_sono, tensao_musc):
+    """Infere e agrega a saída de um único caso (memoizado em `_agregacao_caso`)."""
+    return self.agregar(self.inferencia_caso(freq_card, nivel_preoc, qual_sono, tensao_musc))
+
+  def _calcular_nivel(self, freq_card, nivel_preoc, qual_sono, tensao_musc, metodo_defuzz):
+    """Calcula o nível de ansiedade de um único caso (memoizado em `_nivel_caso`; NaN se nenhuma regra dispara)."""
+    cortes = self.inferencia_caso(freq_card, nivel_preoc, qual_sono, tensao_musc)
+    if not np.any(cortes):
+      return np.nan
+    if metodo_defuzz == 'centroid':
+      return self._centroide_caso(cortes)
+    agregacao = self._agregacao_caso(freq_card, nivel_preoc, qual_sono, tensao_musc)
+    return self.defuzzificar(agregacao, metodo_defuzz)
+
+  def diagnostico_ansiedade(self, freq_card, nivel_preoc, qual_sono, tensao_musc, metodo_defuzz='centroid', verbose=True):
     """
       Realiza o diagnóstico de ansiedade com base nos parâmetros fornecidos.
 
@@ -161,75 +747,157 @@ class DiagnosticoAnsiedadeFuzzy:
           qual_sono (float): Qualidade do sono.
           tensao_musc (float): Tensão muscular.
           metodo_defuzz (str): Método de defuzzificação (padrão: 'centroid').
+          verbose (bool): Exibe o nível de ansiedade calculado (padrão: True).
 
       Returns:
-          str: Diagnóstico textual do nível de ansiedade.
+          str: Diagnóstico textual do nível de ansiedade (`_ROTULO_SEM_REGRA`
+          quando nenhuma regra é ativada).
     """
-    # Atribuição dos valores de entrada ao sistema
-    self.simulacao.input['frequencia_cardiaca'] = freq_card
-    self.simulacao.input['nivel_preocupacao'] = nivel_preoc
-    self.simulacao.input['qualidade_sono'] = qual_sono
-    self.simulacao.input['tensao_muscular'] = tensao_musc
+    # Entradas exatas como chave dos caches (sem arredondamento, que alteraria
+    # as pertinências interpoladas e, com elas, o diagnóstico)
+    entradas = tuple(map(float, (freq_card, nivel_preoc, qual_sono, tensao_musc)))
 
-    # Definição do método de defuzzificação e computação do resultado
-    self.ansiedade.defuzzify_method = metodo_defuzz
-    self.simulacao.compute()
+    # Definição do método de defuzzificação (usado também nos gráficos) e cálculo
+    # do resultado, reaproveitado quando as mesmas entradas já foram avaliadas
+    self.metodo_defuzz = metodo_defuzz
+    nivel_ansiedade = self._nivel_caso(*entradas, metodo_defuzz)
 
     # Obtenção e interpretação do resultado
-    nivel_ansiedade = self.simulacao.output['nivel_ansiedade']
-    print(f"Nível de Ansiedade ({metodo_defuzz}): {nivel_ansiedade:.2f}")
-
-    # Classificação do nível de ansiedade
-    if nivel_ansiedade < 30:
-        return "Baixo nível de ansiedade"
-    elif 30 <= nivel_ansiedade < 60:
-        return "Nível moderado de ansiedade"
-    else:
-        return "Alto nível de ansiedade"
+    if verbose:
+      print(f"Nível de Ansiedade ({metodo_defuzz}): {_formatar_nivel(nivel_ansiedade)}")
 
+    return classificar_ansiedade(nivel_ansiedade)
 
-  def plotar_grafico_individual(self, variavel, titulo, entrada=None):
+
+  def plotar_grafico_individual(self, variavel, titulo, cortes, valor=None, ax=None):
     """
       Plota o gráfico de uma variável fuzzy individual.
 
+      Desenha as funções de pertinência da variável, as áreas ativadas e o valor
+      nítido correspondente, no mesmo formato de `FuzzyVariable.view` do scikit-fuzzy.
+
       Args:
-          variavel (Antecedent ou Consequent): Variável fuzzy a ser plotada.
+          variavel (str): Rótulo da variável fuzzy a ser plotada (chave de `_mfs`).
           titulo (str): Título do gráfico.
-          entrada (float, opcional): Valor de entrada para visualização.
-    """
-    plt.figure(figsize=(8, 4))
-    variavel.view(sim=self.simulacao)
-    plt.title(titulo)
-    plt.ylabel('Pertinência')
-    plt.xlabel(titulo)
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
+          cortes (sequence): Ativação de cada termo da variável (pertinência da
+              entrada, para antecedentes, ou corte acumulado, para o consequente).
+          valor (float, opcional): Valor nítido marcado no gráfico.
+          ax (Axes, opcional): Eixo de destino. Se omitido, uma nova figura é criada e exibida.
+    """
+    import matplotlib.pyplot as plt
+
+    exibir = ax is None
+    if exibir:
+      fig, ax = plt.subplots(figsize=(8, 4))
+
+    # Funções de pertinência e áreas ativadas de cada termo
+    universo = self._universos[variavel]
+    termos = self._mfs[variavel]
+    mfs = list(termos.values())
+    universo_amostrado, cortados = self._cortar_termos(universo, mfs, cortes)
+    for rotulo, mf, cortado in zip(termos, mfs, cortados):
+      linha, = ax.plot(universo, mf, label=rotulo)
+      ax.fill_between(universo_amostrado, 0, cortado, facecolor=linha.get_color(), alpha=0.4)
+
+    # Valor nítido (entrada ou saída defuzzificada) na altura da pertinência ativada
+    if valor is not None and cortados.any():
+      altura = max(np.interp(valor, universo, mf) for mf in mfs)
+      ax.plot([valor] * 2, [0, altura if altura >= 0.1 else 1.0], color='k', lw=3, label='crisp value')
+
+    ax.set_xlim([universo.min(), universo.max()])
+    ax.set_ylim([0, 1.01])
+    ax.set_title(titulo)
+    ax.set_ylabel('Pertinência')
+    ax.set_xlabel(titulo)
+    ax.legend(framealpha=0.5)
+
+    if exibir:
+      fig.tight_layout()
+      plt.show()
 
 
   def plotar_graficos(self, freq_card, nivel_preoc, qual_sono, tensao_musc):
     """
       Plota os gráficos de todas as variáveis fuzzy do sistema.
 
+      Os cinco gráficos são desenhados em uma única figura (grade 3x2), que é
+      reaproveitada nas chamadas seguintes enquanto sua janela estiver aberta.
+      As ativações vêm da inferência do próprio sistema e o nível de ansiedade,
+      do cache preenchido por `diagnostico_ansiedade`, sem simular novamente.
+
       Args:
           freq_card (float): Frequência cardíaca.
           nivel_preoc (float): Nível de preocupação.
           qual_sono (float): Qualidade do sono.
           tensao_musc (float): Tensão muscular.
     """
-    # Atualização dos valores de entrada
-    self.simulacao.input['frequencia_cardiaca'] = freq_card
-    self.simulacao.input['nivel_preocupacao'] = nivel_preoc
-    self.simulacao.input['qualidade_sono'] = qual_sono
-    self.simulacao.input['tensao_muscular'] = tensao_musc
-    self.simulacao.compute()
+    import matplotlib.pyplot as plt
+
+    # Mesmas entradas do diagnóstico, para reaproveitar o seu cache
+    entradas = tuple(map(float, (freq_card, nivel_preoc, qual_sono, tensao_musc)))
+
+    # Pertinência das entradas e cortes dos termos de saída
+    mu = self._fuzzificar_caso(entradas)
+    cortes_saida = self.inferencia_caso(*entradas)
+
+    # Nível de ansiedade pelo último método de defuzzificação usado (sem
+    # marcação no gráfico quando nenhuma regra é ativada)
+    nivel_ansiedade = self._nivel_caso(*entradas, self.metodo_defuzz)
+    if np.isnan(nivel_ansiedade):
+      nivel_ansiedade = None
+
+    # Figura única com um eixo por variável
+    if self._figura is None or not plt.fignum_exists(self._figura[0].number):
+      self._figura = plt.subplots(3, 2, figsize=(10, 12))
+    fig, eixos = self._figura
+
+    graficos = [
+      ('frequencia_cardiaca', 'Frequência Cardíaca'),
+      ('nivel_preocupacao', 'Nível de Preocupação'),
+      ('qualidade_sono', 'Qualidade do Sono'),
+      ('tensao_muscular', 'Tensão Muscular'),
+    ]
+    for ax, (variavel, titulo), valor, mu_k in zip(eixos.flat, graficos, entradas, mu):
+      ax.cla()
+      universo = self._universos[variavel]
+      valor = min(max(valor, universo.min()), universo.max())
+      self.plotar_grafico_individual(variavel, titulo, mu_k[:len(self._mfs[variavel])], valor, ax)
+
+    ax = eixos.flat[len(graficos)]
+    ax.cla()
+    self.plotar_grafico_individual('nivel_ansiedade', 'Nível de Ansiedade', cortes_saida, nivel_ansiedade, ax)
+    eixos.flat[-1].axis('off')
+
+    fig.tight_layout()
+    plt.show()
 
-    # Plotagem dos gráficos individuais
-    self.plotar_grafico_individual(self.freq_cardiaca, 'Frequência Cardíaca', freq_card)
-    self.plotar_grafico_individual(self.preocupacao, 'Nível de Preocupação', nivel_preoc)
-    self.plotar_grafico_individual(self.sono, 'Qualidade do Sono', qual_sono)
-    self.plotar_grafico_individual(self.tensao, 'Tensão Muscular', tensao_musc)
-    self.plotar_grafico_individual(self.ansiedade, 'Nível de Ansiedade', self.simulacao.output['nivel_ansiedade'])
+
+def classificar_ansiedade(nivel_ansiedade):
+  """
+    Converte o nível de ansiedade defuzzificado em um diagnóstico textual.
+
+    A faixa é localizada por busca binária nos limites `_LIMITES_FAIXAS`
+    (abaixo de 30, de 30 a 60 e a partir de 60), o que também classifica um
+    array de níveis de uma só vez. Níveis NaN (nenhuma regra ativada, como
+    retornado por `diagnostico_lote`) recebem o diagnóstico `_ROTULO_SEM_REGRA`
+    em vez de uma faixa.
+
+    Args:
+        nivel_ansiedade (float ou np.ndarray): Nível de ansiedade (0-100).
+
+    Returns:
+        str ou np.ndarray: Diagnóstico textual do nível de ansiedade (um array
+        de diagnósticos, com o mesmo formato, quando recebe um array).
+  """
+  # As reticências mantêm o resultado como array de objetos (str) mesmo para um
+  # nível escalar, que `[()]` converte de volta em str ao final
+  faixas = _ROTULOS_FAIXAS[np.searchsorted(_LIMITES_FAIXAS, nivel_ansiedade, side='right'), ...]
+  return np.where(np.isnan(nivel_ansiedade), _ROTULO_SEM_REGRA, faixas)[()]
+
+
+def _formatar_nivel(nivel_ansiedade):
+  """Formata o nível de ansiedade para exibição ('indefinido' quando é NaN)."""
+  return "indefinido" if np.isnan(nivel_ansiedade) else f"{nivel_ansiedade:.2f}"
 
 
 def entrada_manual(diagnostico_fuzzy, metodo_defuzz='centroid'):
@@ -253,7 +921,8 @@ def entrada_manual(diagnostico_fuzzy, metodo_defuzz='centroid'):
     tensao_musc = float(input("Digite o nível de tensão muscular (0-10): "))
 
     # Verificação se os valores estão dentro dos intervalos permitidos
-    if not (60 <= freq_card <= 120 and 0 <= nivel_preoc <= 10 and 0 <= qual_sono <= 10 and 0 <= tensao_musc <= 10):
+    valores = np.array([freq_card, nivel_preoc, qual_sono, tensao_musc])
+    if not np.all((valores >= _LIMITES_ENTRADA[0]) & (valores <= _LIMITES_ENTRADA[1])):
       print("Valores fora dos intervalos permitidos.")
       return
 
@@ -297,15 +966,20 @@ def casos_de_teste(diagnostico_fuzzy):
     # Métodos de Deffuzificação a serem testados
     metodos = ['centroid', 'bisector', 'mom', 'som', 'lom']
 
+    # Diagnóstico de todos os casos, por todos os métodos, em uma única passagem
+    niveis = diagnostico_fuzzy.diagnostico_lote(casos, metodos)
+    diagnosticos = classificar_ansiedade(niveis)
+
     # Execução dos casos de teste
     for i, caso in enumerate(casos):
       freq_card, nivel_preoc, qual_sono, tensao_musc = caso
-      print(f"\nCaso {i + 1}: FC={freq_card}, Preocupação={nivel_preoc}, Sono={qual_sono}, Tensão={tensao_musc}")
+      linhas = [f"\nCaso {i + 1}: FC={freq_card}, Preocupação={nivel_preoc}, Sono={qual_sono}, Tensão={tensao_musc}"]
 
-      # Testando cada método de deffuzificação
-      for metodo in metodos:
-        resultado = diagnostico_fuzzy.diagnostico_ansiedade(freq_card, nivel_preoc, qual_sono, tensao_musc, metodo)
-        print(f"  Método {metodo}: {resultado}")
+      # Resultado de cada método de deffuzificação, exibido de uma só vez por caso
+      for metodo, nivel_ansiedade, diagnostico in zip(metodos, niveis[i], diagnosticos[i]):
+        linhas.append(f"Nível de Ansiedade ({metodo}): {_formatar_nivel(nivel_ansiedade)}")
+        linhas.append(f"  Método {metodo}: {diagnostico}")
+      sys.stdout.write("\n".join(linhas) + "\n")
 
       # Plotagem dos gráficos para o caso atual
       diagnostico_fuzzy.plotar_graficos(freq_card, nivel_preoc, qual_sono, tensao_musc)
@@ -325,6 +999,35 @@ def casos_de_teste(diagnostico_fuzzy):
     print("Todos os casos de teste foram executados.")
 
 
+# Telas dos menus, cada uma exibida de uma só vez junto com o pedido da opção
+_SUBMENU = """
+
+#===#==#==#==#==#==#==#==#==#==#==#==#===#
+|   Submenu - Métodos de Desfuzificação  |
+#===#==#==#==#==#==#==#==#==#==#==#==#===#
+|         1. Centroid                    |
+|         2. Bisector                    |
+|         3. MOM (Mean of Maximum)       |
+|         4. SOM (Smallest of Maximum)   |
+|         5. LOM (Largest of Maximum)    |
+|         6. Voltar ao menu principal    |
+#===#==#==#==#==#==#==#==#==#==#==#==#===#
+
+Escolha uma opção: """
+
+_MENU_PRINCIPAL = """
+
+#===#==#==#==#==#==#==#==#==#==#==#==#===#
+|  Sistema de Diagnóstico de Ansiedade   |
+#===#==#==#==#==#==#==#==#==#==#==#==#===#
+|          1. Entrada manual             |
+|          2. Executar Testes            |
+|          3. Sair                       |
+#===#==#==#==#==#==#==#==#==#==#==#==#===#
+
+Escolha uma opção: """
+
+
 def submenu(diagnostico_fuzzy):
   """
     Exibe o submenu de métodos de desfuzificação e processa a escolha do usuário.
@@ -337,18 +1040,7 @@ def submenu(diagnostico_fuzzy):
   """
 
   while True:
-    print("\n")
-    print("#===#==#==#==#==#==#==#==#==#==#==#==#===#")
-    print("|   Submenu - Métodos de Desfuzificação  |")
-    print("#===#==#==#==#==#==#==#==#==#==#==#==#===#")
-    print("|         1. Centroid                    |")
-    print("|         2. Bisector                    |")
-    print("|         3. MOM (Mean of Maximum)       |")
-    print("|         4. SOM (Smallest of Maximum)   |")
-    print("|         5. LOM (Largest of Maximum)    |")
-    print("|         6. Voltar ao menu principal    |")
-    print("#===#==#==#==#==#==#==#==#==#==#==#==#===#")
-    opcao = input("\nEscolha uma opção: ")
+    opcao = input(_SUBMENU)
 
     if opcao == '1':
         entrada_manual(diagnostico_fuzzy, metodo_defuzz='centroid')
@@ -372,32 +1064,28 @@ def menu_principal():
 
     Esta função cria uma instância do sistema de diagnóstico fuzzy e
     apresenta um menu com opções para entrada manual, execução de testes
-    ou saída do programa.
+    ou saída do programa. O fim da entrada (EOF, por exemplo com a entrada
+    redirecionada de um arquivo) ou Ctrl+C encerram o programa normalmente.
   """
 
   diagnostico_fuzzy = DiagnosticoAnsiedadeFuzzy()
 
-  while True:
-    # Exibição do menu principal
-    print("\n")
-    print("#===#==#==#==#==#==#==#==#==#==#==#==#===#")
-    print("|  Sistema de Diagnóstico de Ansiedade   |")
-    print("#===#==#==#==#==#==#==#==#==#==#==#==#===#")
-    print("|          1. Entrada manual             |")
-    print("|          2. Executar Testes            |")
-    print("|          3. Sair                       |")
-    print("#===#==#==#==#==#==#==#==#==#==#==#==#===#")
-    opcao = input("\nEscolha uma opção: ")
-
-    if opcao == '1':
-        submenu(diagnostico_fuzzy)
-    elif opcao == '2':
-        casos_de_teste(diagnostico_fuzzy)
-    elif opcao == '3':
-        print("Saindo do programa.")
-        break
-    else:
-        print("Opção inválida. Por favor, escolha uma opção válida.")
+  try:
+    while True:
+      # Exibição do menu principal
+      opcao = input(_MENU_PRINCIPAL)
+
+      if opcao == '1':
+          submenu(diagnostico_fuzzy)
+      elif opcao == '2':
+          casos_de_teste(diagnostico_fuzzy)
+      elif opcao == '3':
+          print("Saindo do programa.")
+          break
+      else:
+          print("Opção inválida. Por favor, escolha uma opção válida.")
+  except (EOFError, KeyboardInterrupt):
+    sys.stdout.write("\nSaindo do programa.\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""
+  Testes de regressão do sistema de diagnóstico de ansiedade.
+
+  A inferência e a defuzzificação pelo centroide são implementadas diretamente
+  sobre arrays do NumPy; estes testes as comparam com o scikit-fuzzy
+  (`skfuzzy.control` e `fuzz.defuzz`), que é a referência do sistema.
+
+  Execução: python -m unittest (a partir do diretório Class).
+"""
+
+import pickle
+import unittest
+import warnings
+from functools import reduce
+
+import numpy as np
+import skfuzzy as fuzz
+from skfuzzy import control as ctrl
+
+from FuzzyAnxietyDiagnosis import (
+  DiagnosticoAnsiedadeFuzzy, _LIMITES_ENTRADA, _REGRAS, _ROTULO_SEM_REGRA, _UNIV_ANS, classificar_ansiedade,
+)
+
+
+METODOS = ['centroid', 'bisector', 'mom', 'som', 'lom']
+
+# Tolerância da comparação com o scikit-fuzzy (diferenças só de arredondamento)
+TOLERANCIA = 1e-9
+
+
+def defuzz_referencia(diagnostico, cortes, metodo):
+  """Defuzzifica os cortes com `fuzz.defuzz` (NaN quando nenhuma regra dispara)."""
+  if not np.any(cortes):
+    return np.nan
+  return fuzz.defuzz(*diagnostico.agregar(cortes), metodo)
+
+
+def sistema_controle(diagnostico):
+  """Monta o mesmo sistema em `skfuzzy.control`, a partir de `_MF` e `_REGRAS`."""
+  variaveis = [ctrl.Antecedent(np.array(universo), rotulo) for rotulo, universo in diagnostico._ANTECEDENTES]
+  saida = ctrl.Consequent(np.array(_UNIV_ANS), 'nivel_ansiedade')
+  for variavel in variaveis + [saida]:
+    for termo, mf in diagnostico._MF[variavel.label].items():
+      variavel[termo] = np.array(mf)
+
+  regras = []
+  for operador, termos, consequente in _REGRAS:
+    graus = [
+      reduce(lambda a, b: a | b, (variavel[t] for t in termo)) if isinstance(termo, tuple) else variavel[termo]
+      for variavel, termo in zip(variaveis, termos)
+    ]
+    antecedente = reduce((lambda a, b: a & b) if operador == 'e' else (lambda a, b: a | b), graus)
+    regras.append(ctrl.Rule(antecedente, saida[consequente]))
+  return ctrl.ControlSystem(regras), saida
+
+
+class TestDiagnosticoAnsiedadeFuzzy(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    cls.diagnostico = DiagnosticoAnsiedadeFuzzy()
+    cls.rng = np.random.default_rng(2024)
+
+  def entradas_aleatorias(self, n):
+    """Entradas uniformes nos intervalos permitidos, metade delas inteiras."""
+    entradas = self.rng.uniform(_LIMITES_ENTRADA[0], _LIMITES_ENTRADA[1], size=(n, 4))
+    entradas[::2] = np.round(entradas[::2])
+    return entradas
+
+  def assertNiveisIguais(self, obtido, esperado):
+    np.testing.assert_allclose(obtido, esperado, rtol=0, atol=TOLERANCIA, equal_nan=True)
+
+  def test_centroide_contra_defuzz(self):
+    # Cortes aleatórios, nulos, máximos e iguais a pertinências do universo
+    # (cruzamentos sobre os pontos do universo)
+    niveis = np.concatenate([[0.0, 1.0], np.unique(self.diagnostico._mf_saida)])
+    cortes = self.rng.random((2000, 3))
+    sorteio = self.rng.random(cortes.shape)
+    cortes[sorteio < 0.3] = self.rng.choice(niveis, size=cortes.shape)[sorteio < 0.3]
+    cortes[:10] = 0.0
+
+    esperado = np.array([defuzz_referencia(self.diagnostico, c, 'centroid') for c in cortes])
+    self.assertTrue(np.isnan(esperado).any())
+    self.assertNiveisIguais(self.diagnostico.centroide_lote(cortes), esperado)
+
+    for c, nivel in zip(cortes, esperado):
+      if np.isnan(nivel):
+        with self.assertRaises(fuzz.EmptyMembershipError):
+          self.diagnostico._centroide_caso(c)
+      else:
+        self.assertAlmostEqual(self.diagnostico._centroide_caso(c), nivel, delta=TOLERANCIA)
+
+  def test_diagnostico_lote_contra_defuzz(self):
+    entradas = self.entradas_aleatorias(400)
+    niveis = self.diagnostico.diagnostico_lote(entradas, METODOS)
+
+    for entrada, niveis_caso in zip(entradas, niveis):
+      cortes = self.diagnostico.inferencia_caso(*entrada)
+      esperado = [defuzz_referencia(self.diagnostico, cortes, metodo) for metodo in METODOS]
+      self.assertNiveisIguais(niveis_caso, esperado)
+
+  def test_caso_contra_lote(self):
+    # Entradas fracionárias: o caminho escalar (com os seus caches) deve dar o
+    # mesmo nível e o mesmo diagnóstico que o lote, em todos os métodos
+    diagnostico = DiagnosticoAnsiedadeFuzzy()
+    entradas = np.concatenate([[(99.6, 4, 7, 4), (100, 4, 7, 4)], self.rng.uniform(_LIMITES_ENTRADA[0], _LIMITES_ENTRADA[1], size=(400, 4))])
+    niveis = diagnostico.diagnostico_lote(entradas, METODOS)
+    diagnosticos = classificar_ansiedade(niveis)
+
+    for entrada, niveis_caso, diagnosticos_caso in zip(entradas, niveis, diagnosticos):
+      for metodo, nivel, esperado in zip(METODOS, niveis_caso, diagnosticos_caso):
+        self.assertEqual(diagnostico.diagnostico_ansiedade(*entrada, metodo, verbose=False), esperado, (entrada, metodo))
+        self.assertNiveisIguais(diagnostico._nivel_caso(*entrada, metodo), nivel)
+
+  def test_diagnostico_lote_contra_controle(self):
+    sistema, saida = sistema_controle(self.diagnostico)
+    simulacao = ctrl.ControlSystemSimulation(sistema, cache=False)
+    entradas = np.concatenate([[(65, 2, 8, 1), (100, 4, 7, 4), (110, 9, 2, 9)], self.entradas_aleatorias(40)])
+    niveis = self.diagnostico.diagnostico_lote(entradas, METODOS)
+
+    for entrada, niveis_caso in zip(entradas, niveis):
+      for metodo, nivel in zip(METODOS, niveis_caso):
+        saida.defuzzify_method = metodo
+        simulacao.inputs(dict(zip((rotulo for rotulo, _ in self.diagnostico._ANTECEDENTES), entrada)))
+        with warnings.catch_warnings():
+          warnings.simplefilter('ignore')
+          simulacao.compute()
+
+        # Sem regra ativada, a simulação não produz saída pelo centroide (o primeiro
+        # método) e o nível é indefinido em todos os métodos, embora mom, som e
+        # lom da simulação ainda retornem um valor arbitrário
+        if metodo == 'centroid':
+          sem_regra = 'nivel_ansiedade' not in simulacao.output
+        if sem_regra:
+          self.assertTrue(np.isnan(nivel), (entrada, metodo))
+        else:
+          self.assertNiveisIguais(nivel, simulacao.output['nivel_ansiedade'])
+
+  def test_lote_vazio(self):
+    self.assertEqual(self.diagnostico.diagnostico_lote(np.empty((0, 4)), METODOS).shape, (0, len(METODOS)))
+    self.assertEqual(self.diagnostico.diagnostico_lote(np.empty((0, 4)), METODOS, np.float32).shape, (0, len(METODOS)))
+    self.assertEqual(self.diagnostico.diagnostico_ansiedade_lote([], [], [], []).shape, (0,))
+
+  def test_pickle(self):
+    self.diagnostico.diagnostico_ansiedade(80, 5, 5, 5, 'mom', verbose=False)
+    copia = pickle.loads(pickle.dumps(self.diagnostico))
+    self.assertEqual(copia.metodo_defuzz, 'mom')
+    self.assertIs(copia._mfs, DiagnosticoAnsiedadeFuzzy._MF)
+    self.assertEqual(copia._universos.keys(), self.diagnostico._universos.keys())
+    self.assertEqual(copia.diagnostico_ansiedade(80, 5, 5, 5, verbose=False),
+                     self.diagnostico.diagnostico_ansiedade(80, 5, 5, 5, verbose=False))
+
+  def test_entrada_ausente(self):
+    # Uma linha com NaN (por exemplo, um campo vazio em `np.loadtxt`) não
+    # interrompe o lote: só o seu caso fica indefinido
+    entradas = np.array([(80, 5, 5, 5), (np.nan, 5, 5, 5), (110, 9, 2, np.nan), (110, 9, 2, 9)])
+    for dtype in (np.float64, np.float32):
+      with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        niveis = self.diagnostico.diagnostico_lote(entradas, METODOS, dtype)
+      self.assertTrue(np.isnan(niveis[1:3]).all())
+      self.assertNiveisIguais(niveis[[0, 3]], self.diagnostico.diagnostico_lote(entradas[[0, 3]], METODOS, dtype))
+      self.assertFalse(np.isnan(niveis[[0, 3]]).any())
+
+  def test_nenhuma_regra_ativada(self):
+    # Caso de teste 6 do menu: nenhuma regra dispara
+    niveis = self.diagnostico.diagnostico_lote([(100, 4, 7, 4)], METODOS)[0]
+    self.assertTrue(np.isnan(niveis).all())
+    self.assertEqual(list(classificar_ansiedade(niveis)), [_ROTULO_SEM_REGRA] * len(METODOS))
+    for metodo in METODOS:
+      self.assertEqual(self.diagnostico.diagnostico_ansiedade(100, 4, 7, 4, metodo, verbose=False), _ROTULO_SEM_REGRA)
+    self.assertEqual(list(classificar_ansiedade(np.array([10.0, np.nan, 70.0]))),
+                     ["Baixo nível de ansiedade", _ROTULO_SEM_REGRA, "Alto nível de ansiedade"])
+
+
+if __name__ == "__main__":
+  unittest.main()